@@ -0,0 +1 @@
+# Keeps backend/ on sys.path so tests import modules the way main.py does
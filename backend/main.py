@@ -1,7 +1,8 @@
 import json
-from fastapi import FastAPI, Form, File, UploadFile
+from fastapi import FastAPI, Form, File, HTTPException, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from technical_knowledge import TechnicalKnowledgeScraper
+from scheduler import QuotaExceededError, ScrapeScheduler
 from typing import List
 import shutil
 import os
@@ -19,6 +20,17 @@ app.add_middleware(
 UPLOAD_DIR = "upload_pdf"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# Shared across requests so teams are scheduled fairly and hosts are not hammered.
+# SCRAPE_TEAM_WEIGHTS is a JSON object of team_id -> round-robin weight
+scheduler = ScrapeScheduler(
+    max_concurrent_fetches=int(os.getenv("SCRAPE_MAX_CONCURRENT_FETCHES", "8")),
+    per_team_concurrency=int(os.getenv("SCRAPE_PER_TEAM_CONCURRENCY", "2")),
+    byte_quota=int(os.getenv("SCRAPE_TEAM_BYTE_QUOTA", str(200 * 1024 * 1024))),
+    quota_window=float(os.getenv("SCRAPE_QUOTA_WINDOW", "3600")),
+    host_delay=float(os.getenv("SCRAPE_HOST_DELAY", "1.0")),
+    team_weights=json.loads(os.getenv("SCRAPE_TEAM_WEIGHTS", "{}")),
+)
+
 
 @app.post("/scrape")
 def scrape(
@@ -26,6 +38,12 @@ def scrape(
     urls: str = Form(...),
     pdfs: List[UploadFile] = File(default=[]),
 ):
+    # Refuse up front rather than charging for a crawl that cannot start
+    try:
+        scheduler.check_quota(team_id)
+    except QuotaExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
     urls_list = json.loads(urls)
     pdf_paths = []
 
@@ -37,6 +55,6 @@ def scrape(
 
     sources = urls_list + pdf_paths
 
-    scraper = TechnicalKnowledgeScraper("aline123")
+    scraper = TechnicalKnowledgeScraper(team_id, scheduler=scheduler)
     knowledge_base = scraper.scrape_all_sources(sources)
     return knowledge_base.to_dict()
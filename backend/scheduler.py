@@ -0,0 +1,206 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterator, Optional
+from urllib.parse import urlparse
+
+
+class QuotaExceededError(Exception):
+    """Raised when a team has used up its byte quota for the current window"""
+
+
+@dataclass
+class _Ticket:
+    granted: bool = False
+
+
+@dataclass
+class _TeamState:
+    """Per-team wait queue and accounting"""
+
+    weight: int
+    credits: int
+    waiting: Deque[_Ticket] = field(default_factory=deque)
+    running: int = 0
+    bytes_used: int = 0
+    window_start: float = field(default_factory=time.monotonic)
+
+
+class ScrapeScheduler:
+    """Shared scheduler for outbound fetches across concurrent requests
+
+    Every HTTP fetch takes a slot for its duration. At most
+    ``max_concurrent_fetches`` slots are held at once and each team may hold
+    at most ``per_team_concurrency`` of them. When a slot frees up it goes to
+    the next waiting team by weighted round-robin, so a team crawling a large
+    site gets interleaved page by page with teams running small jobs instead
+    of holding capacity for the whole crawl. Each team may also download at
+    most ``byte_quota`` bytes per ``quota_window`` seconds, and fetches to the
+    same host are spaced at least ``host_delay`` seconds apart regardless of
+    which team issued them. The host delay is waited out before taking a
+    slot, so throttled crawls never hold capacity other hosts could use.
+    """
+
+    def __init__(
+        self,
+        max_concurrent_fetches: int = 8,
+        per_team_concurrency: int = 2,
+        byte_quota: int = 200 * 1024 * 1024,
+        quota_window: float = 3600.0,
+        host_delay: float = 1.0,
+        team_weights: Optional[Dict[str, int]] = None,
+    ):
+        self.max_concurrent_fetches = max_concurrent_fetches
+        self.per_team_concurrency = per_team_concurrency
+        self.byte_quota = byte_quota
+        self.quota_window = quota_window
+        self.host_delay = host_delay
+        self.team_weights = team_weights or {}
+
+        self._lock = threading.Lock()
+        self._slot_released = threading.Condition(self._lock)
+        self._teams: Dict[str, _TeamState] = {}
+        self._rotation: Deque[str] = deque()  # teams with waiting fetches
+        self._active = 0
+        self._host_next_slot: Dict[str, float] = {}
+        self._host_lock = threading.Lock()
+
+    @contextmanager
+    def fetch_slot(self, team_id: str, url: str) -> Iterator[None]:
+        """Hold a fetch slot for ``url`` on behalf of a team"""
+        self.check_quota(team_id)
+        self.wait_for_host(url)
+        self.acquire(team_id)
+        try:
+            yield
+        finally:
+            self.release(team_id)
+
+    def acquire(self, team_id: str) -> None:
+        """Block until the team is granted a fetch slot"""
+        ticket = _Ticket()
+        with self._lock:
+            team = self._get_team(team_id)
+            if not team.waiting and team_id not in self._rotation:
+                self._rotation.append(team_id)
+            team.waiting.append(ticket)
+            self._dispatch()
+            while not ticket.granted:
+                self._slot_released.wait()
+
+    def release(self, team_id: str) -> None:
+        """Return a slot taken with acquire"""
+        with self._lock:
+            self._active -= 1
+            self._teams[team_id].running -= 1
+            self._dispatch()
+            self._evict_idle_teams()
+
+    def wait_for_host(self, url: str) -> None:
+        """Block until the global politeness delay for the URL's host has passed"""
+        host = urlparse(url).netloc
+        with self._host_lock:
+            now = time.monotonic()
+            # Slots in the past impose no delay, so forget those hosts
+            for stale in [h for h, t in self._host_next_slot.items() if t <= now]:
+                del self._host_next_slot[stale]
+            slot = max(now, self._host_next_slot.get(host, now))
+            self._host_next_slot[host] = slot + self.host_delay
+        if slot > now:
+            time.sleep(slot - now)
+
+    def check_quota(self, team_id: str) -> None:
+        """Raise QuotaExceededError if the team has no byte budget left"""
+        if self.remaining_bytes(team_id) <= 0:
+            raise self._quota_error(team_id)
+
+    def remaining_bytes(self, team_id: str) -> int:
+        """Bytes the team may still download in the current window"""
+        with self._lock:
+            team = self._teams.get(team_id)
+            if team is None:
+                return self.byte_quota
+            self._roll_window(team)
+            return self.byte_quota - team.bytes_used
+
+    def charge_bytes(self, team_id: str, num_bytes: int) -> None:
+        """Charge downloaded bytes, raising QuotaExceededError once over quota"""
+        with self._lock:
+            team = self._get_team(team_id)
+            self._roll_window(team)
+            team.bytes_used += num_bytes
+            over_quota = team.bytes_used > self.byte_quota
+        if over_quota:
+            raise self._quota_error(team_id)
+
+    def _quota_error(self, team_id: str) -> QuotaExceededError:
+        return QuotaExceededError(
+            f"Team {team_id} exceeded byte quota of {self.byte_quota} bytes"
+        )
+
+    def _get_team(self, team_id: str) -> _TeamState:
+        team = self._teams.get(team_id)
+        if team is None:
+            weight = max(1, self.team_weights.get(team_id, 1))
+            team = _TeamState(weight=weight, credits=weight)
+            self._teams[team_id] = team
+        return team
+
+    def _roll_window(self, team: _TeamState) -> None:
+        now = time.monotonic()
+        if now - team.window_start >= self.quota_window:
+            team.window_start = now
+            team.bytes_used = 0
+
+    def _evict_idle_teams(self) -> None:
+        """Forget teams with nothing in flight whose quota window has expired"""
+        now = time.monotonic()
+        idle = [
+            team_id
+            for team_id, team in self._teams.items()
+            if not team.running
+            and not team.waiting
+            and now - team.window_start >= self.quota_window
+        ]
+        for team_id in idle:
+            del self._teams[team_id]
+
+    def _dispatch(self) -> None:
+        """Grant free slots to waiting teams; caller holds the lock"""
+        granted = False
+        while self._active < self.max_concurrent_fetches:
+            ticket = self._next_ticket()
+            if ticket is None:
+                break
+            ticket.granted = True
+            self._active += 1
+            granted = True
+        if granted:
+            self._slot_released.notify_all()
+
+    def _next_ticket(self) -> Optional[_Ticket]:
+        """Pick the next waiter by weighted round-robin; caller holds the lock"""
+        for _ in range(len(self._rotation)):
+            team_id = self._rotation[0]
+            team = self._teams[team_id]
+
+            # A team at its cap is skipped so it cannot block the others
+            if team.running >= self.per_team_concurrency:
+                self._rotation.rotate(-1)
+                continue
+
+            ticket = team.waiting.popleft()
+            team.running += 1
+            team.credits -= 1
+
+            if not team.waiting:
+                self._rotation.popleft()
+                team.credits = team.weight
+            elif team.credits <= 0:
+                self._rotation.rotate(-1)
+                team.credits = team.weight
+
+            return ticket
+        return None
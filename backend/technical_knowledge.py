@@ -3,14 +3,15 @@ from urllib.parse import urljoin
 import requests
 from bs4 import BeautifulSoup
 import time
-import re
 from urllib.parse import urljoin, urlparse
 from dataclasses import dataclass, asdict
-from typing import List, Dict, Optional, Any
+from typing import Callable, List, Dict, Optional, Any
 import PyPDF2
 import io
 import logging
 from abc import ABC, abstractmethod
+from text_normalization import normalize_text, normalize_pdf_text
+from scheduler import QuotaExceededError, ScrapeScheduler
 
 # Configure logging
 logging.basicConfig(
@@ -38,17 +39,29 @@ class KnowledgeBase:
 
     team_id: str
     items: List[KnowledgeItem]
+    quota_exceeded: bool = False
 
     def to_dict(self) -> Dict[str, Any]:
-        return {"team_id": self.team_id, "items": [asdict(item) for item in self.items]}
+        return {
+            "team_id": self.team_id,
+            "items": [asdict(item) for item in self.items],
+            "quota_exceeded": self.quota_exceeded,
+        }
 
 
 class BaseScraper(ABC):
     """Abstract base class for all scrapers"""
 
-    def __init__(self, team_id: str, delay: float = 1.0):
+    def __init__(
+        self,
+        team_id: str,
+        delay: float = 1.0,
+        scheduler: Optional[ScrapeScheduler] = None,
+    ):
         self.team_id = team_id
         self.delay = delay
+        self.scheduler = scheduler
+        self.quota_exceeded = False
         self.session = requests.Session()
         self.session.headers.update(
             {
@@ -64,21 +77,65 @@ class BaseScraper(ABC):
     def _fetch_page(self, url: str) -> Optional[BeautifulSoup]:
         """Safely fetch and parse a web page"""
         try:
-            time.sleep(self.delay)  # Rate limiting
-            response = self.session.get(url, timeout=10)
+            response = self._get(url, timeout=10)
             response.raise_for_status()
             return BeautifulSoup(response.content, "html.parser")
         except Exception as e:
             logger.error(f"Failed to fetch {url}: {e}")
             return None
 
-    def _clean_text(self, text: str) -> str:
-        """Clean and normalize text content"""
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """Rate-limited GET that is charged against the team's byte quota"""
+        if not self.scheduler:
+            time.sleep(self.delay)  # Rate limiting
+            return self.session.get(url, **kwargs)
 
-        text = re.sub(r"\s+", " ", text.strip())
+        try:
+            with self.scheduler.fetch_slot(self.team_id, url):
+                response = self.session.get(url, stream=True, **kwargs)
+                with response:
+                    # Populate .content ourselves so the body is read under quota
+                    response._content = self._read_within_quota(response)
+                    response._content_consumed = True
+            return response
+        except QuotaExceededError:
+            # Callers log this like any other fetch failure; the crawl loops
+            # check the flag and stop instead of fetching further pages
+            self.quota_exceeded = True
+            raise
+
+    def _read_within_quota(self, response: requests.Response) -> bytes:
+        """Read a streamed body, stopping once the team's byte quota runs out"""
+        content_length = response.headers.get("Content-Length", "")
+        if content_length.isdigit():
+            if int(content_length) > self.scheduler.remaining_bytes(self.team_id):
+                raise QuotaExceededError(
+                    f"{response.url} is {content_length} bytes, "
+                    f"more than team {self.team_id} has left in its quota"
+                )
 
-        text = re.sub(r"[\u200b-\u200d\ufeff]", "", text)
-        return text
+        chunks = []
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            self.scheduler.charge_bytes(self.team_id, len(chunk))
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def _scrape_pages(
+        self, urls: List[str], scrape_page: Callable[[str], Optional[KnowledgeItem]]
+    ) -> List[KnowledgeItem]:
+        """Scrape each URL in turn, stopping early once the quota is spent"""
+        items = []
+        for url in urls:
+            if self.quota_exceeded:
+                break
+            item = scrape_page(url)
+            if item:
+                items.append(item)
+        return items
+
+    def _clean_text(self, text: str) -> str:
+        """Clean and normalize text content"""
+        return normalize_text(text)
 
     def _extract_author(self, soup: BeautifulSoup) -> str:
         """Extract author from common HTML patterns"""
@@ -135,10 +192,7 @@ class InterviewingIOScraper(BaseScraper):
 
         logger.info(f"Found {len(post_links)} blog posts to scrape")
 
-        for url in post_links:
-            item = self._scrape_single_blog_post(url)
-            if item:
-                items.append(item)
+        items.extend(self._scrape_pages(post_links, self._scrape_single_blog_post))
 
         return items
 
@@ -202,10 +256,11 @@ class InterviewingIOScraper(BaseScraper):
 
         logger.info(f"Found {len(guide_links)} company guides to scrape")
 
-        for url in guide_links:
-            item = self._scrape_guide_page(url, "Company Guide")
-            if item:
-                items.append(item)
+        items.extend(
+            self._scrape_pages(
+                guide_links, lambda url: self._scrape_guide_page(url, "Company Guide")
+            )
+        )
 
         return items
 
@@ -228,10 +283,11 @@ class InterviewingIOScraper(BaseScraper):
 
         logger.info(f"Found {len(guide_links)} interview guides to scrape")
 
-        for url in guide_links:
-            item = self._scrape_guide_page(url, "Interview Guide")
-            if item:
-                items.append(item)
+        items.extend(
+            self._scrape_pages(
+                guide_links, lambda url: self._scrape_guide_page(url, "Interview Guide")
+            )
+        )
 
         return items
 
@@ -311,10 +367,7 @@ class NilMamanoScraper(BaseScraper):
 
         logger.info(f"Found {len(post_links)} DSA blog posts to scrape")
 
-        for url in post_links:
-            item = self._scrape_single_post(url)
-            if item:
-                items.append(item)
+        items.extend(self._scrape_pages(post_links, self._scrape_single_post))
 
         return items
 
@@ -374,10 +427,7 @@ class QuillBlogScraper(BaseScraper):
 
         post_links = self._extract_links_simple(base_url)
 
-        for url in post_links:
-            item = self._scrape_single_post_simple(url)
-            if item:
-                items.append(item)
+        items.extend(self._scrape_pages(post_links, self._scrape_single_post_simple))
 
         return items
 
@@ -385,7 +435,7 @@ class QuillBlogScraper(BaseScraper):
         """Use requests to extract blog links."""
         post_links = []
         try:
-            response = requests.get(url, timeout=10)
+            response = self._get(url, timeout=10)
             response.raise_for_status()
             soup = BeautifulSoup(response.content, "html.parser")
 
@@ -403,7 +453,7 @@ class QuillBlogScraper(BaseScraper):
     def _scrape_single_post_simple(self, url: str) -> Optional[KnowledgeItem]:
         """Use requests to fetch a single blog post."""
         try:
-            response = requests.get(url, timeout=10)
+            response = self._get(url, timeout=10)
             response.raise_for_status()
             soup = BeautifulSoup(response.content, "html.parser")
 
@@ -438,7 +488,7 @@ class PDFScraper(BaseScraper):
         """Scrape PDF content - source can be file path or URL"""
         try:
             if source.startswith("http"):
-                response = self.session.get(source)
+                response = self._get(source, timeout=30)
                 pdf_file = io.BytesIO(response.content)
             else:
                 pdf_file = open(source, "rb")
@@ -460,7 +510,7 @@ class PDFScraper(BaseScraper):
                         chapters.append(
                             KnowledgeItem(
                                 title=chapter_title,
-                                content=self._clean_text(chapter_content),
+                                content=normalize_pdf_text(chapter_content),
                                 content_type="book",
                                 source_url=(
                                     source if source.startswith("http") else None
@@ -481,7 +531,7 @@ class PDFScraper(BaseScraper):
                 chapters.append(
                     KnowledgeItem(
                         title=chapter_title,
-                        content=self._clean_text(chapter_content),
+                        content=normalize_pdf_text(chapter_content),
                         content_type="book",
                         source_url=source if source.startswith("http") else None,
                         author="Aline",
@@ -514,6 +564,8 @@ class SubstackScraper(BaseScraper):
 
         post_links = []
         for archive_url in archive_urls:
+            if self.quota_exceeded:
+                break
             soup = self._fetch_page(archive_url)
             if soup:
                 # Find post links
@@ -526,10 +578,7 @@ class SubstackScraper(BaseScraper):
 
         logger.info(f"Found {len(post_links)} Substack posts to scrape")
 
-        for url in post_links:
-            item = self._scrape_substack_post(url)
-            if item:
-                items.append(item)
+        items.extend(self._scrape_pages(post_links, self._scrape_substack_post))
 
         return items
 
@@ -586,59 +635,94 @@ class SubstackScraper(BaseScraper):
         return self._clean_text(text)
 
 
+class GenericScraper(BaseScraper):
+    """Fallback scraper for unknown sites"""
+
+    def scrape(self, source: str) -> List[KnowledgeItem]:
+        soup = self._fetch_page(source)
+        if not soup:
+            return []
+
+        title_elem = soup.find("h1") or soup.find("title")
+        title = (
+            self._clean_text(title_elem.get_text())
+            if title_elem
+            else "Unknown Content"
+        )
+
+        content_elem = soup.find("article") or soup.find("main")
+        content = self._clean_text((content_elem or soup).get_text())
+
+        return [
+            KnowledgeItem(
+                title=title,
+                content=content,
+                content_type="other",
+                source_url=source,
+                author=self._extract_author(soup),
+                team_id=self.team_id,
+            )
+        ]
+
+
 class TechnicalKnowledgeScraper:
     """Main scraper orchestrator"""
 
-    def __init__(self, team_id: str = "aline123"):
+    def __init__(
+        self, team_id: str = "aline123", scheduler: Optional[ScrapeScheduler] = None
+    ):
         self.team_id = team_id
+        self.scheduler = scheduler
         self.scrapers = {
-            "interviewing.io": InterviewingIOScraper(team_id),
-            "nilmamano.com": NilMamanoScraper(team_id),
-            "pdf": PDFScraper(team_id),
-            "substack": SubstackScraper(team_id),
-            "quill.co": QuillBlogScraper(team_id),
+            "interviewing.io": InterviewingIOScraper(team_id, scheduler=scheduler),
+            "nilmamano.com": NilMamanoScraper(team_id, scheduler=scheduler),
+            "pdf": PDFScraper(team_id, scheduler=scheduler),
+            "substack": SubstackScraper(team_id, scheduler=scheduler),
+            "quill.co": QuillBlogScraper(team_id, scheduler=scheduler),
+            "generic": GenericScraper(team_id, scheduler=scheduler),
         }
 
     def scrape_all_sources(self, sources: List[str]) -> KnowledgeBase:
         """Scrape all specified sources"""
         all_items = []
 
+        # Sources run one after another on the request thread, so each
+        # scraper's session is only ever used by one thread; fairness across
+        # requests comes from the scheduler's per-fetch slots
+        quota_exceeded = False
         for source in sources:
-            logger.info(f"Processing source: {source}")
-
-            try:
-                if "interviewing.io" in source:
-                    items = self.scrapers["interviewing.io"].scrape(source)
-                elif "nilmamano.com" in source:
-                    items = self.scrapers["nilmamano.com"].scrape(source)
-                elif "quill.co" in source:
-                    items = self.scrapers["quill.co"].scrape(source)
-                elif source.endswith(".pdf"):
-                    items = self.scrapers["pdf"].scrape(source)
-                elif "substack" in source:
-                    items = self.scrapers["substack"].scrape(source)
-                else:
-                    items = self._generic_scrape(source)
+            all_items.extend(self._scrape_source(source))
+            if any(scraper.quota_exceeded for scraper in self.scrapers.values()):
+                # Keep what was already scraped (and paid for) and skip the rest
+                logger.warning(f"Byte quota exhausted for team {self.team_id}")
+                quota_exceeded = True
+                break
 
-                all_items.extend(items)
-                logger.info(f"Extracted {len(items)} items from {source}")
+        return KnowledgeBase(
+            team_id=self.team_id, items=all_items, quota_exceeded=quota_exceeded
+        )
 
-            except Exception as e:
-                logger.error(f"Failed to process {source}: {e}")
-                continue
+    def _scrape_source(self, source: str) -> List[KnowledgeItem]:
+        """Dispatch a single source to the matching scraper"""
+        logger.info(f"Processing source: {source}")
 
-        return KnowledgeBase(team_id=self.team_id, items=all_items)
+        try:
+            if "interviewing.io" in source:
+                items = self.scrapers["interviewing.io"].scrape(source)
+            elif "nilmamano.com" in source:
+                items = self.scrapers["nilmamano.com"].scrape(source)
+            elif "quill.co" in source:
+                items = self.scrapers["quill.co"].scrape(source)
+            elif source.endswith(".pdf"):
+                items = self.scrapers["pdf"].scrape(source)
+            elif "substack" in source:
+                items = self.scrapers["substack"].scrape(source)
+            else:
+                items = self.scrapers["generic"].scrape(source)
 
-    def _generic_scrape(self, url: str) -> List[KnowledgeItem]:
-        """Generic scraper for unknown sites (like quill.co/blog)"""
-        scraper = BaseScraper(self.team_id)
-        soup = scraper._fetch_page(url)
-        if not soup:
-            return []
+            logger.info(f"Extracted {len(items)} items from {source}")
+            return items
 
-        title_elem = soup.find("h1") or soup.find("title")
-        title = (
-            scraper._clean_text(title_elem.get_text())
-            if title_elem
-            else "Unknown Content"
-        )
+        except Exception as e:
+            logger.error(f"Failed to process {source}: {e}")
+            return []
@@ -0,0 +1,159 @@
+import threading
+import time
+
+import pytest
+
+from scheduler import QuotaExceededError, ScrapeScheduler
+
+
+def _wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out waiting for condition"
+        time.sleep(0.001)
+
+
+def _waiting(scheduler, team_id):
+    team = scheduler._teams.get(team_id)
+    return len(team.waiting) if team else 0
+
+
+def _start_waiter(scheduler, team_id, granted, hold=None):
+    def run():
+        scheduler.acquire(team_id)
+        granted.append(team_id)
+        if hold:
+            hold.wait()
+        scheduler.release(team_id)
+
+    def seen():
+        return _waiting(scheduler, team_id) + granted.count(team_id)
+
+    # Block until the waiter is queued (or already granted) so order is fixed
+    expected = seen() + 1
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    _wait_until(lambda: seen() >= expected)
+    return thread
+
+
+def test_weighted_round_robin_order():
+    scheduler = ScrapeScheduler(
+        max_concurrent_fetches=1, per_team_concurrency=5, team_weights={"a": 2}
+    )
+    scheduler.acquire("holder")
+
+    granted = []
+    threads = [
+        _start_waiter(scheduler, team_id, granted)
+        for team_id in ["a", "a", "a", "b", "b"]
+    ]
+    scheduler.release("holder")
+    for thread in threads:
+        thread.join(timeout=2)
+
+    assert granted == ["a", "a", "b", "a", "b"]
+
+
+def test_team_at_cap_is_skipped():
+    scheduler = ScrapeScheduler(max_concurrent_fetches=2, per_team_concurrency=1)
+    scheduler.acquire("a")
+
+    granted = []
+    hold = threading.Event()
+    waiter_a = _start_waiter(scheduler, "a", granted, hold)
+    waiter_b = _start_waiter(scheduler, "b", granted, hold)
+
+    _wait_until(lambda: granted == ["b"])
+    scheduler.release("a")
+    _wait_until(lambda: granted == ["b", "a"])
+
+    hold.set()
+    waiter_a.join(timeout=2)
+    waiter_b.join(timeout=2)
+
+
+def test_fetch_slot_released_on_error():
+    scheduler = ScrapeScheduler(max_concurrent_fetches=1, host_delay=0)
+
+    with pytest.raises(KeyboardInterrupt):
+        with scheduler.fetch_slot("a", "https://example.com"):
+            raise KeyboardInterrupt
+
+    assert scheduler._active == 0
+    with scheduler.fetch_slot("b", "https://example.com"):
+        pass
+
+
+def test_quota_raises_and_resets_after_window():
+    scheduler = ScrapeScheduler(byte_quota=10, quota_window=0.05)
+    scheduler.charge_bytes("a", 10)
+
+    with pytest.raises(QuotaExceededError):
+        scheduler.check_quota("a")
+    scheduler.check_quota("b")
+
+    time.sleep(0.06)
+    scheduler.check_quota("a")
+    assert scheduler.remaining_bytes("a") == 10
+
+
+def test_charge_bytes_raises_once_over_quota():
+    scheduler = ScrapeScheduler(byte_quota=10)
+    scheduler.charge_bytes("a", 6)
+
+    with pytest.raises(QuotaExceededError):
+        scheduler.charge_bytes("a", 6)
+    assert scheduler.remaining_bytes("a") == -2
+
+
+def test_wait_for_host_spaces_same_host():
+    scheduler = ScrapeScheduler(host_delay=0.05)
+
+    start = time.monotonic()
+    for _ in range(3):
+        scheduler.wait_for_host("https://example.com/page")
+    assert time.monotonic() - start >= 0.1
+
+    start = time.monotonic()
+    scheduler.wait_for_host("https://other.example.com/page")
+    assert time.monotonic() - start < 0.05
+
+
+def test_throttled_host_does_not_hold_slots_from_other_hosts():
+    scheduler = ScrapeScheduler(
+        max_concurrent_fetches=2, per_team_concurrency=2, host_delay=0.5
+    )
+    scheduler.wait_for_host("https://big.substack.com")
+
+    def crawl(team_id):
+        with scheduler.fetch_slot(team_id, "https://big.substack.com/p/post"):
+            pass
+
+    crawlers = [
+        threading.Thread(target=crawl, args=(team_id,), daemon=True)
+        for team_id in ["a", "a", "b", "b"]
+    ]
+    for thread in crawlers:
+        thread.start()
+    # Let every crawler reserve its turn on the throttled host
+    time.sleep(0.05)
+
+    start = time.monotonic()
+    with scheduler.fetch_slot("c", "https://other.com/page"):
+        pass
+    assert time.monotonic() - start < 0.1
+
+    for thread in crawlers:
+        thread.join(timeout=5)
+
+
+def test_idle_teams_and_past_host_slots_are_evicted():
+    scheduler = ScrapeScheduler(quota_window=0, host_delay=0)
+
+    with scheduler.fetch_slot("a", "https://example.com"):
+        pass
+    scheduler.wait_for_host("https://other.example.com")
+
+    assert scheduler._teams == {}
+    assert "example.com" not in scheduler._host_next_slot
@@ -0,0 +1,34 @@
+from text_normalization import normalize_pdf_text, normalize_text
+
+
+def test_normalize_text_collapses_whitespace():
+    assert normalize_text("  a \n\t b  ") == "a b"
+
+
+def test_normalize_text_strips_zero_width_characters():
+    assert normalize_text("\ufeffzero\u200bwidth\u200c\u200djoin") == "zerowidthjoin"
+
+
+def test_normalize_text_strips_soft_hyphen():
+    assert normalize_text("hyphen\u00adation") == "hyphenation"
+
+
+def test_normalize_pdf_text_expands_ligatures():
+    assert normalize_pdf_text("e\ufb03cient \ufb01nal \ufb02ow") == "efficient final flow"
+
+
+def test_normalize_pdf_text_keeps_math_notation():
+    assert normalize_pdf_text("O(n²), x₁, ½") == "O(n²), x₁, ½"
+
+
+def test_normalize_pdf_text_rejoins_hyphenated_line_breaks():
+    assert normalize_pdf_text("exam-\nple and exam\u00ad\nple") == "example and example"
+
+
+def test_normalize_pdf_text_keeps_capitalised_compounds():
+    assert normalize_pdf_text("Pre-\nOrder") == "Pre- Order"
+
+
+def test_normalize_pdf_text_joins_lowercase_compounds():
+    # Known tradeoff: lowercase compounds split at a line break lose the hyphen
+    assert normalize_pdf_text("well-\nknown trade-\noff") == "wellknown tradeoff"
@@ -0,0 +1,51 @@
+import re
+
+# Precompiled once at import instead of going through the re cache per call
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# PyPDF2 breaks words across lines as "exam-\nple", so a hyphen or soft
+# hyphen at a line break is dropped whenever the next line continues in
+# lowercase. This also joins genuine lowercase compounds ("well-\nknown" ->
+# "wellknown"); only compounds whose second part is capitalised
+# ("Pre-\nOrder") keep the hyphen
+_HYPHENATION_RE = re.compile(
+    r"(?<=\w)[-\u00ad][ \t]*\r?\n[ \t]*(?=[a-z\ufb00-\ufb06])"
+)
+
+# Zero-width characters and the soft hyphen are dropped in a single C-level pass
+_INVISIBLE = {
+    "\u00ad": None,
+    "\u200b": None,
+    "\u200c": None,
+    "\u200d": None,
+    "\ufeff": None,
+}
+_INVISIBLE_TABLE = str.maketrans(_INVISIBLE)
+
+# Only the Latin ligatures (U+FB00-U+FB06) are expanded rather than applying
+# NFKC to the whole text: NFKC would also flatten superscripts, subscripts and
+# fractions, turning "O(n²)" into "O(n2)"
+_PDF_TABLE = str.maketrans(
+    {
+        **_INVISIBLE,
+        "\ufb00": "ff",
+        "\ufb01": "fi",
+        "\ufb02": "fl",
+        "\ufb03": "ffi",
+        "\ufb04": "ffl",
+        "\ufb05": "st",
+        "\ufb06": "st",
+    }
+)
+
+
+def normalize_text(text: str) -> str:
+    """Strip invisible characters and collapse whitespace"""
+    return _WHITESPACE_RE.sub(" ", text.translate(_INVISIBLE_TABLE)).strip()
+
+
+def normalize_pdf_text(text: str) -> str:
+    """Normalize PyPDF2 output: expand ligatures, rejoin hyphenated line
+    breaks, then collapse whitespace"""
+    text = _HYPHENATION_RE.sub("", text).translate(_PDF_TABLE)
+    return _WHITESPACE_RE.sub(" ", text).strip()